@@ -1,23 +1,37 @@
 # You would run this in your own Python environment
-# pip install selenium pandas webdriver-manager boto3
-
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service as ChromeService
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-# To manage ChromeDriver installation automatically
-from webdriver_manager.chrome import ChromeDriverManager
+# pip install requests orjson pandas numpy boto3
 
+import requests
 import pandas as pd
+import numpy as np
 import time
 import json
+import orjson # Faster JSON decoding for the strip-rates payload
+
+# --- CME HTTP Configuration ---
+CME_SOFR_STRIP_RATES_URL = "https://www.cmegroup.com/services/sofr-strip-rates/"
+CME_REQUEST_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept': 'application/json',
+    'Referer': 'https://www.cmegroup.com/'
+}
+
+# One pooled session per process so repeat fetches in a long-running task reuse the TCP/TLS connection
+SESSION = requests.Session()
+SESSION.headers.update(CME_REQUEST_HEADERS)
 
 # --- New Imports for DynamoDB ---
 import boto3
+from dynamodb_helpers import DYNAMODB_BATCH_SIZE, DYNAMODB_CLIENT_CONFIG, write_items_to_dynamodb, load_state_item, save_state_item
 import decimal # For accurate number storage in DynamoDB
 from datetime import datetime, timezone # For timestamp conversion
 import os # To get environment variables for table name
+import logging
+
+# --- Logging Configuration ---
+# LOG_LEVEL=WARNING in production drops the per-run info logs; DEBUG adds per-item detail
+logging.basicConfig(level=os.environ.get('LOG_LEVEL', 'INFO'), format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+logger = logging.getLogger(__name__)
 
 # --- DynamoDB Configuration ---
 # It's good practice to get the table name from an environment variable
@@ -29,73 +43,73 @@ DYNAMODB_TABLE_NAME = os.environ.get('DYNAMODB_TABLE', 'RealTimeChartData') # De
 # For local testing, this might be via ~/.aws/credentials or environment variables
 # For Fargate, this will be handled by the task role.
 try:
-    dynamodb = boto3.resource('dynamodb')
+    dynamodb = boto3.resource('dynamodb', config=DYNAMODB_CLIENT_CONFIG)
     table = dynamodb.Table(DYNAMODB_TABLE_NAME)
-    print(f"DynamoDB resource initialized. Target table: {DYNAMODB_TABLE_NAME}")
+    # Low-level client for batch writes of pre-serialized items (skips the resource layer's per-item serialization)
+    dynamodb_client = boto3.client('dynamodb', config=DYNAMODB_CLIENT_CONFIG)
+    logger.info("DynamoDB resource initialized. Target table: %s", DYNAMODB_TABLE_NAME)
 except Exception as e:
-    print(f"Error initializing DynamoDB resource: {e}")
+    logger.error("Error initializing DynamoDB resource: %s", e)
     dynamodb = None
     table = None
+    dynamodb_client = None
 # --- End DynamoDB Configuration ---
 
+# --- CME Conditional GET Cache ---
+# The strip rates change once per business day, so the ETag/Last-Modified validators of the last stored
+# response are kept in a DynamoDB state item and sent back; an unchanged payload then costs a single 304 round trip.
+SOFR_STATE_ID = os.environ.get('SOFR_STATE_ID', 'SOFR_StripRates#state')
+
+def load_cache_validators():
+    """Returns the stored {'etag', 'lastModified'} validators, or an empty dict if none are stored."""
+    if dynamodb_client is None:
+        return {}
+    return load_state_item(dynamodb_client, DYNAMODB_TABLE_NAME, SOFR_STATE_ID)
+
+def save_cache_validators(validators):
+    """Persists the response validators so the next fetch can be made conditional."""
+    if dynamodb_client is None or not validators:
+        return
+    save_state_item(dynamodb_client, DYNAMODB_TABLE_NAME, SOFR_STATE_ID, validators)
+
 
-def fetch_sofr_strip_rates_with_selenium():
+def fetch_sofr_strip_rates(session=None):
     """
-    Attempts to fetch SOFR strip rates from CME Group using Selenium
+    Fetches SOFR strip rates from CME Group's JSON endpoint
     and parses the specific JSON structure provided.
+    Uses the module-level SESSION unless another requests.Session is passed in.
+    Returns None if CME reports the data unchanged since the last stored fetch (HTTP 304);
+    otherwise the DataFrame carries the response validators in df.attrs['cache_validators'].
     """
+    session = session or SESSION
     current_timestamp = int(time.time() * 1000)
-    url = f"https://www.cmegroup.com/services/sofr-strip-rates/?isProtected&_t={current_timestamp}"
-
-    # --- WebDriver Setup ---
-    try:
-        # Use webdriver_manager (install with: pip install webdriver-manager)
-        service = ChromeService(ChromeDriverManager().install())
-        
-        # Optional: Add headless mode to run without opening a browser window
-        chrome_options = webdriver.ChromeOptions()
-        chrome_options.add_argument('--headless')
-        chrome_options.add_argument('--disable-gpu') # Recommended for headless
-        chrome_options.add_argument('--window-size=1920,1080') # Can help with some headless issues
-        chrome_options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36")
-
-        chrome_options.add_argument('--user-data-dir=/tmr/user-data')
-
-        chrome_options.add_argument('--no-sandbox')
-        chrome_options.add_argument('--disable-dev-shm-usage')
-        
-        driver = webdriver.Chrome(service=service, options=chrome_options)
-        print("WebDriver Manager successfully set up ChromeDriver (headless mode).")
-    except Exception as e_manager:
-        import traceback
-        print(f"Error setting up ChromeDriver with WebDriver Manager: {e_manager}")
-        traceback.print_exc()
-        return pd.DataFrame()
+    url = f"{CME_SOFR_STRIP_RATES_URL}?isProtected&_t={current_timestamp}"
 
     extracted_data_df = pd.DataFrame()
-    page_content_for_debug = "" # Initialize for debugging
+    response = None
 
     try:
-        print(f"Navigating to URL: {url}")
-        driver.get(url)
-
-        WebDriverWait(driver, 20).until(
-            EC.presence_of_element_located((By.TAG_NAME, "body"))
-        )
-
-        page_content_for_debug = driver.page_source # For debugging if JSON parsing fails
-
-        try:
-            pre_element = driver.find_element(By.TAG_NAME, "pre")
-            json_text = pre_element.text
-            print("Found JSON data within a <pre> tag.")
-        except:
-            body_element = driver.find_element(By.TAG_NAME, "body")
-            json_text = body_element.text
-            print("Did not find a <pre> tag, using body text directly.")
-        
-        print(f"Attempting to parse JSON content (length: {len(json_text)} characters).")
-        data = json.loads(json_text)
+        conditional_headers = {}
+        cached_validators = load_cache_validators()
+        if cached_validators.get('etag'):
+            conditional_headers['If-None-Match'] = cached_validators['etag']
+        if cached_validators.get('lastModified'):
+            conditional_headers['If-Modified-Since'] = cached_validators['lastModified']
+
+        logger.info("Requesting URL: %s", url)
+        response = session.get(url, headers=conditional_headers, timeout=15)
+        if response.status_code == 304:
+            logger.info("CME Group reports the SOFR strip rates unchanged since the last fetch (HTTP 304).")
+            return None
+        response.raise_for_status()
+
+        # The body is only read once the full response has arrived, so an empty body is a real error, not a timing issue
+        if not response.content:
+            logger.error("CME Group returned an empty response body (HTTP %s).", response.status_code)
+            return extracted_data_df
+
+        logger.debug("Attempting to parse JSON content (length: %d bytes).", len(response.content))
+        data = orjson.loads(response.content)
         
         processed_data = []
         if isinstance(data, dict) and 'resultsStrip' in data:
@@ -122,34 +136,24 @@ def fetch_sofr_strip_rates_with_selenium():
 
                 term_rates = {'1M': None, '3M': None, '6M': None, '1Y': None} # Initialize
                 if 'rates' in day_data and 'sofrRatesFixing' in day_data['rates']:
-                    rates_by_term = {}
+                    # Single pass: per term keep the first fixing with the best score
+                    # (2 = on the entry's date at T10:00, 1 = on the entry's date, 0 = fallback)
+                    best_by_term = {}
                     for rate_info_item in day_data['rates']['sofrRatesFixing']:
                         term = rate_info_item.get('term')
-                        if term:
-                            if term not in rates_by_term:
-                                rates_by_term[term] = []
-                            rates_by_term[term].append(rate_info_item)
-                    
-                    for term_key, L_rates_info in rates_by_term.items():
-                        if term_key not in term_rates: # Only process expected terms
+                        if term not in term_rates: # Only process expected terms
                             continue
 
-                        selected_rate_info = None
-                        if len(L_rates_info) == 1:
-                            selected_rate_info = L_rates_info[0]
-                        else:
-                            # Prioritize by timestamp matching the entry's date
-                            on_date_rates = [r for r in L_rates_info if r.get('timestamp','').startswith(date_str)]
-                            if on_date_rates:
-                                t10_rates = [r for r in on_date_rates if 'T10:00' in r.get('timestamp','')]
-                                if t10_rates:
-                                    selected_rate_info = t10_rates[0]
-                                else:
-                                    selected_rate_info = on_date_rates[0]
-                            else:
-                                selected_rate_info = L_rates_info[0] # Fallback
-
-                        if selected_rate_info and 'price' in selected_rate_info:
+                        rate_timestamp = rate_info_item.get('timestamp') or ''
+                        score = 0
+                        if date_str and rate_timestamp.startswith(date_str):
+                            score = 2 if 'T10:00' in rate_timestamp else 1
+
+                        if term not in best_by_term or score > best_by_term[term][0]:
+                            best_by_term[term] = (score, rate_info_item)
+
+                    for term_key, (_, selected_rate_info) in best_by_term.items():
+                        if 'price' in selected_rate_info:
                             try:
                                 term_rates[term_key] = float(selected_rate_info['price'])
                             except (ValueError, TypeError):
@@ -172,40 +176,26 @@ def fetch_sofr_strip_rates_with_selenium():
                 df = pd.DataFrame(processed_data)
                 if 'Date' in df.columns:
                     df['Date'] = pd.to_datetime(df['Date'])
+                df.attrs['cache_validators'] = {
+                    'etag': response.headers.get('ETag'),
+                    'lastModified': response.headers.get('Last-Modified')
+                }
                 extracted_data_df = df
             else:
-                print("Processed data list is empty (no items in 'resultsStrip' or loop limit hit).")
+                logger.warning("Processed data list is empty (no items in 'resultsStrip' or loop limit hit).")
 
         else:
-            print("Could not find 'resultsStrip' key in JSON. Full data dump for inspection:")
-            print(json.dumps(data, indent=2))
+            logger.warning("Could not find 'resultsStrip' key in JSON. Full data dump for inspection:\n%s", json.dumps(data, indent=2))
             
     except json.JSONDecodeError as e:
-        print(f"Error decoding JSON from Selenium: {e}")
-        print("Received text that was not valid JSON. Page content snippet:")
-        print(page_content_for_debug[:1000])
+        logger.error("Error decoding JSON from CME Group: %s", e)
+        logger.error("Received text that was not valid JSON. Response snippet:\n%s", response.text[:1000] if response is not None else 'No response text')
+    except requests.exceptions.RequestException as e:
+        logger.error("Request error while fetching SOFR strip rates: %s", e)
     except Exception as e:
-        print(f"An error occurred with Selenium: {e}")
-        import traceback
-        traceback.print_exc()
-    finally:
-        if 'driver' in locals() and driver:
-            driver.quit()
-            print("WebDriver closed.")
-            
-    return extracted_data_df
+        logger.exception("An error occurred while processing SOFR strip rates: %s", e)
 
-# --- DynamoDB Helper Function ---
-def convert_date_to_utc_timestamp_ms(date_obj):
-    """Converts a pandas Timestamp or datetime object to a UTC Unix timestamp in milliseconds.
-       Assumes the date represents the "as of" date, pegged to midnight UTC.
-    """
-    if pd.isna(date_obj):
-        return None
-    dt_obj = pd.to_datetime(date_obj) # Ensure it's a pandas Timestamp/datetime
-    # Make it timezone-aware at UTC, assuming the date is effectively a UTC date label
-    dt_obj_utc = dt_obj.tz_localize('UTC') if dt_obj.tzinfo is None else dt_obj.tz_convert('UTC')
-    return int(dt_obj_utc.timestamp() * 1000)
+    return extracted_data_df
 
 # --- DynamoDB Storage Function ---
 def store_sofr_data_in_dynamodb(df):
@@ -214,11 +204,11 @@ def store_sofr_data_in_dynamodb(df):
     as a separate item in DynamoDB.
     """
     if df.empty:
-        print("DataFrame is empty, nothing to store in DynamoDB.")
+        logger.info("DataFrame is empty, nothing to store in DynamoDB.")
         return 0 # Return count of items stored
     
     if table is None:
-        print("DynamoDB table is not initialized. Cannot store data.")
+        logger.error("DynamoDB table is not initialized. Cannot store data.")
         return 0
 
     # Define a mapping from DataFrame columns to metricId and unit
@@ -234,76 +224,94 @@ def store_sofr_data_in_dynamodb(df):
         'SOFR Index': {'metricId': 'SOFR_Index', 'unit': None} # No unit for index
     }
 
-    items_stored_count = 0
-    with table.batch_writer() as batch:
-        for index, row in df.iterrows():
-            date_obj = row['Date']
-            db_timestamp = convert_date_to_utc_timestamp_ms(date_obj)
-
-            if db_timestamp is None:
-                print(f"Skipping row with invalid date: {row['Date']}")
-                continue
-
-            source_date_str = pd.to_datetime(date_obj).strftime('%Y-%m-%d')
-
-            for column_name, metric_info in metric_mapping.items():
-                if column_name in row and not pd.isna(row[column_name]):
-                    try:
-                        # Convert value to string first, then to Decimal, for robustness
-                        value_str = str(row[column_name])
-                        value = decimal.Decimal(value_str)
-                    except (ValueError, TypeError, decimal.InvalidOperation) as e:
-                        print(f"Could not convert value '{row[column_name]}' to Decimal for {metric_info['metricId']} on {source_date_str}. Error: {e}")
-                        continue
-
-                    item = {
-                        'metricId': metric_info['metricId'],
-                        'timestamp': db_timestamp, # This is already a number
-                        'value': value,
-                        'sourceDate': source_date_str
-                    }
-                    if metric_info['unit']:
-                        item['unit'] = metric_info['unit']
-                    
-                    # print(f"Preparing to store: {item}") # Uncomment for debugging
-                    batch.put_item(Item=item)
-                    items_stored_count += 1
-    
-    print(f"Successfully prepared {items_stored_count} items for DynamoDB batch write.")
+    dates = pd.to_datetime(df['Date']) # Ensure datetime64 dtype
+    invalid_dates = dates.isna()
+    if invalid_dates.any():
+        logger.warning("Skipping %d rows with an invalid date.", int(invalid_dates.sum()))
+        df, dates = df[~invalid_dates], dates[~invalid_dates]
+
+    # Dates are UTC date labels pegged to midnight, so a direct datetime64[ms] cast yields the epoch milliseconds.
+    # Computed once per date on the wide frame, before melting multiplies the rows by the metric count.
+    df = df.assign(
+        timestamp=dates.values.astype('datetime64[ms]').astype('int64'),
+        sourceDate=dates.dt.strftime('%Y-%m-%d')
+    )
+
+    # Reshape to one row per (date, metric) so NaN filtering and metric lookup run vectorized
+    value_columns = [column_name for column_name in metric_mapping if column_name in df.columns]
+    long_df = df.melt(id_vars=['timestamp', 'sourceDate'], value_vars=value_columns, var_name='column', value_name='value')
+
+    # Filter missing, non-numeric and non-finite values once with a single mask; Decimal cannot store NaN/Inf
+    numeric_values = pd.to_numeric(long_df['value'], errors='coerce')
+    finite_mask = np.isfinite(numeric_values.to_numpy(dtype='float64'))
+    unparseable_count = int((long_df['value'].notna() & ~finite_mask).sum())
+    if unparseable_count:
+        logger.warning("Skipping %d non-numeric or non-finite SOFR values.", unparseable_count)
+    # Bulk str conversion in pandas instead of a str() call per value before the Decimal parse
+    long_df = long_df[finite_mask].assign(value=numeric_values[finite_mask].astype(str))
+
+    long_df['metricId'] = long_df['column'].map({column_name: info['metricId'] for column_name, info in metric_mapping.items()})
+    long_df['unit'] = long_df['column'].map({column_name: info['unit'] for column_name, info in metric_mapping.items()}).fillna('')
+
+    items = []
+    item_columns = ['metricId', 'timestamp', 'value', 'sourceDate', 'unit']
+    for metric_id, timestamp, value_str, source_date_str, unit in long_df[item_columns].itertuples(index=False, name=None):
+        item = {
+            'metricId': metric_id,
+            'timestamp': int(timestamp),
+            'value': decimal.Decimal(value_str), # Finite float strings, which Decimal parses exactly
+            'sourceDate': source_date_str
+        }
+        if unit:
+            item['unit'] = unit
+
+        logger.debug("Preparing to store: %s", item)
+        items.append(item)
+
+    items_stored_count = write_items_to_dynamodb(dynamodb_client, DYNAMODB_TABLE_NAME, items)
+
+    logger.info("Successfully wrote %d items to DynamoDB in batches of %d.", items_stored_count, DYNAMODB_BATCH_SIZE)
     return items_stored_count
 
 
 # --- Main Execution Block ---
 if __name__ == '__main__':
-    print("Fetching SOFR strip rates from CME Group using Selenium...")
+    logger.info("Fetching SOFR strip rates from CME Group...")
     
-    sofr_data_selenium_df = fetch_sofr_strip_rates_with_selenium()
+    sofr_data_df = fetch_sofr_strip_rates()
 
-    if not sofr_data_selenium_df.empty:
-        print("\nLast 5 Days of SOFR Strip Rates (via Selenium):")
+    if sofr_data_df is None:
+        logger.info("SOFR strip rates are unchanged since the last stored fetch. Skipping parse and DynamoDB storage.")
+    elif not sofr_data_df.empty:
         pd.set_option('display.max_columns', None)
         pd.set_option('display.width', 200) # Adjust width as needed for your console
         pd.set_option('display.float_format', '{:.5f}'.format) # Format float precision
-        print(sofr_data_selenium_df)
+        logger.info("Last 5 Days of SOFR Strip Rates (via CME JSON endpoint):\n%s", sofr_data_df)
 
         # --- Store data in DynamoDB ---
         if table: # Check if table was initialized successfully
-            print("\nStoring fetched SOFR data into DynamoDB...")
-            items_written = store_sofr_data_in_dynamodb(sofr_data_selenium_df)
-            print(f"Data storage process completed. {items_written} items processed for DynamoDB.")
+            logger.info("Storing fetched SOFR data into DynamoDB...")
+            try:
+                items_written = store_sofr_data_in_dynamodb(sofr_data_df)
+            except Exception as e:
+                # The validators are not saved, so the next run gets a full response and rewrites every item
+                logger.exception("Storing SOFR data in DynamoDB failed: %s", e)
+            else:
+                logger.info("Data storage process completed. %d items processed for DynamoDB.", items_written)
+                save_cache_validators(sofr_data_df.attrs.get('cache_validators'))
         else:
-            print("\nSkipping DynamoDB storage because table was not initialized.")
+            logger.warning("Skipping DynamoDB storage because table was not initialized.")
         # --- End Store data in DynamoDB ---
 
     else:
-        print("\nCould not retrieve or parse the SOFR strip rates data using Selenium.")
-
-    print("\n--- Important Notes for Selenium ---")
-    print("1. WebDriver: Script uses webdriver-manager for automatic ChromeDriver setup.")
-    print("2. Headless Mode: Enabled by default for convenience.")
-    print("3. Data Structure: Parsing is specific to the observed JSON from 'resultsStrip'.")
-    print("4. Website Changes: If CME Group changes its website structure or JSON format, this script may need updates.")
-    print("\n--- Important Notes for DynamoDB ---")
-    print(f"5. DynamoDB Table: Data is intended for table '{DYNAMODB_TABLE_NAME}'.")
-    print("6. AWS Credentials: Ensure AWS credentials and region are configured (e.g., via IAM role for Fargate, or local AWS CLI config).")
-    print("7. Table Schema: Assumes 'metricId' (String, HASH), 'timestamp' (Number, RANGE).")
+        logger.error("Could not retrieve or parse the SOFR strip rates data from CME Group.")
+
+    # Static run notes; only emitted with LOG_LEVEL=DEBUG
+    logger.debug("--- Important Notes for CME Fetch ---")
+    logger.debug("1. Transport: Script requests the CME JSON endpoint directly; no browser is required.")
+    logger.debug("2. Data Structure: Parsing is specific to the observed JSON from 'resultsStrip'.")
+    logger.debug("3. Website Changes: If CME Group changes its endpoint or JSON format, this script may need updates.")
+    logger.debug("--- Important Notes for DynamoDB ---")
+    logger.debug("4. DynamoDB Table: Data is intended for table '%s'.", DYNAMODB_TABLE_NAME)
+    logger.debug("5. AWS Credentials: Ensure AWS credentials and region are configured (e.g., via IAM role for Fargate, or local AWS CLI config).")
+    logger.debug("6. Table Schema: Assumes 'metricId' (String, HASH), 'timestamp' (Number, RANGE).")
@@ -1,12 +1,22 @@
 # --- START OF FILE CNBC_Fetcher.py ---
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import pandas as pd
-from datetime import datetime, timezone
-import json
+import numpy as np
+import orjson # Faster JSON encode/decode on the request/response hot path (replaces stdlib json)
 import boto3
 import decimal
 import os
-import time # For potential retries or waits
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+from dynamodb_helpers import DYNAMODB_BATCH_SIZE, DYNAMODB_CLIENT_CONFIG, write_items_to_dynamodb, load_state_item, save_state_item
+
+# --- Logging Configuration ---
+# LOG_LEVEL=WARNING in production drops the per-run info logs; DEBUG adds per-bar detail
+logging.basicConfig(level=os.environ.get('LOG_LEVEL', 'INFO'), format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+logger = logging.getLogger(__name__)
 
 # --- Configuration from Environment Variables ---
 SYMBOL_TO_FETCH = os.environ.get('SYMBOL_TO_FETCH', 'US10YTIP') # e.g., US10YTIP, US10Y
@@ -14,10 +24,70 @@ TIME_RANGE_TO_FETCH = os.environ.get('TIME_RANGE_TO_FETCH', '1D') # e.g., 1D, 5D
 METRIC_ID_PREFIX = os.environ.get('METRIC_ID_PREFIX', 'CNBC') # e.g., CNBC
 METRIC_NAME_SUFFIX = os.environ.get('METRIC_NAME_SUFFIX', 'Close') # e.g., Close, Rate
 UNIT_FOR_METRIC = os.environ.get('UNIT_FOR_METRIC', '%') # e.g., %, basis_points
+# Optional comma-separated list of symbols fetched concurrently in one task; defaults to SYMBOL_TO_FETCH
+SYMBOLS_TO_FETCH = [s.strip() for s in os.environ.get('SYMBOLS_TO_FETCH', SYMBOL_TO_FETCH).split(',') if s.strip()] # e.g., US10YTIP,US10Y
+# Optional comma-separated list of time ranges; every symbol is fetched for every range. Defaults to TIME_RANGE_TO_FETCH
+TIME_RANGES_TO_FETCH = [t.strip() for t in os.environ.get('TIME_RANGES_TO_FETCH', TIME_RANGE_TO_FETCH).split(',') if t.strip()] # e.g., 1D,5D
+MAX_FETCH_WORKERS = int(os.environ.get('MAX_FETCH_WORKERS', '8'))
+
+def build_metric_id(symbol, time_range):
+    """Constructs the dynamic Metric ID for DynamoDB, e.g. CNBC_US10YTIP_1D_Close or CNBC_US10Y_5Y_Rate."""
+    return f"{METRIC_ID_PREFIX}_{symbol}_{time_range}_{METRIC_NAME_SUFFIX}"
+
+def build_fetch_jobs(symbols=None, time_ranges=None):
+    """Returns the (symbol, time_range, metric_id) jobs for one run, one per symbol/time range pair."""
+    symbols = SYMBOLS_TO_FETCH if symbols is None else symbols
+    time_ranges = TIME_RANGES_TO_FETCH if time_ranges is None else time_ranges
+    return [(symbol, time_range, build_metric_id(symbol, time_range)) for symbol in symbols for time_range in time_ranges]
+
+# --- CNBC HTTP Session ---
+CNBC_REQUEST_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept': 'application/json',
+    'Accept-Encoding': 'gzip, deflate',
+    'Referer': 'https://www.cnbc.com/',
+    'Origin': 'https://www.cnbc.com'
+}
+
+CNBC_GRAPHQL_URL = "https://webql-redesign.cnbcfm.com/graphql"
+CNBC_OPERATION_NAME = "getQuoteChartData"
+# The persisted-query extension is the same for every symbol and time range, so it is serialized once at import
+CNBC_EXTENSIONS_PARAM = orjson.dumps({
+    "persistedQuery": {
+        "version": 1,
+        "sha256Hash": "9e1670c29a10707c417a1efd327d4b2b1d456b77f1426e7e84fb7d399416bb6b"
+    }
+}).decode()
 
-# Construct the dynamic Metric ID for DynamoDB
-# Example: CNBC_US10YTIP_1D_Close or CNBC_US10Y_5Y_Rate
-METRIC_ID_FOR_DYNAMODB = f"{METRIC_ID_PREFIX}_{SYMBOL_TO_FETCH}_{TIME_RANGE_TO_FETCH}_{METRIC_NAME_SUFFIX}"
+def build_request_url(symbol, time_range):
+    """
+    Returns the full GraphQL GET URL for a symbol and time range; only the variables are serialized
+    per call, next to the pre-serialized extensions param.
+    """
+    variables_payload = {"symbol": symbol, "timeRange": time_range}
+    return CNBC_GRAPHQL_URL + '?' + urlencode({
+        "operationName": CNBC_OPERATION_NAME,
+        "variables": orjson.dumps(variables_payload).decode(),
+        "extensions": CNBC_EXTENSIONS_PARAM
+    })
+
+CNBC_REQUEST_TIMEOUT = (3, 30) # (connect, read) seconds: fail fast on a dead connect, allow slow large payloads
+
+# One pooled keep-alive session shared by all fetches (and fetch threads); retries and backoff are
+# handled inside urllib3 so a retry reuses the open connection instead of paying a new TLS handshake.
+SESSION = requests.Session()
+SESSION.headers.update(CNBC_REQUEST_HEADERS)
+SESSION.mount('https://', HTTPAdapter(
+    pool_connections=4, # Number of per-host pools; all requests go to the single CNBC GraphQL host
+    pool_maxsize=MAX_FETCH_WORKERS, # One reusable socket per concurrent fetch thread
+    max_retries=Retry(
+        total=3,
+        backoff_factor=0.3, # urllib3 2.x: no delay before the first retry, then 0.6s and 1.2s
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=['GET'], # The GraphQL query is a GET, so retrying it is idempotent
+        respect_retry_after_header=True # Honour CNBC's Retry-After on 429/503
+    )
+))
 
 # --- DynamoDB Setup ---
 DYNAMODB_TABLE_NAME = os.environ.get('DYNAMODB_TABLE', 'RealTimeChartData')
@@ -25,193 +95,239 @@ DYNAMODB_TABLE_NAME = os.environ.get('DYNAMODB_TABLE', 'RealTimeChartData')
 # If running in Fargate in the same region as DynamoDB, this often works by default.
 # For explicit control: boto3.resource('dynamodb', region_name='your-region')
 try:
-    dynamodb = boto3.resource('dynamodb')
+    dynamodb = boto3.resource('dynamodb', config=DYNAMODB_CLIENT_CONFIG)
     table = dynamodb.Table(DYNAMODB_TABLE_NAME)
+    # Low-level client for batch writes of pre-serialized items (skips the resource layer's per-item serialization)
+    dynamodb_client = boto3.client('dynamodb', config=DYNAMODB_CLIENT_CONFIG)
 except Exception as e:
-    print(f"Error initializing DynamoDB resource: {e}")
+    logger.error("Error initializing DynamoDB resource: %s", e)
     # If this fails, the script likely can't proceed.
     # Consider exiting or more robust error handling for a production system.
     raise
 
-def store_data_in_dynamodb(df, metric_id_to_store, unit):
+def store_data_in_dynamodb(df, metric_id_to_store, unit, latest_stored_timestamp=None):
     """
-    Processes the DataFrame and stores each data point in DynamoDB.
+    Processes the DataFrame and stores each data point in DynamoDB, skipping bars older than
+    latest_stored_timestamp (the watermark of the last complete write) when it is given.
     """
     if df is None or df.empty:
-        print(f"DataFrame for {metric_id_to_store} is None or empty, nothing to store.")
+        logger.info("DataFrame for %s is None or empty, nothing to store.", metric_id_to_store)
         return 0
 
-    items_stored_count = 0
     # Ensure the table resource is valid
     if table is None:
-        print("DynamoDB table object is not initialized. Cannot store data.")
+        logger.error("DynamoDB table object is not initialized. Cannot store data.")
         return 0
 
-    with table.batch_writer() as batch:
-        for index, row in df.iterrows():
-            datetime_obj = row['DateTime']
-            # Ensure datetime_obj is timezone-aware (UTC) before timestamping if it's naive
-            if datetime_obj.tzinfo is None:
-                datetime_obj = datetime_obj.replace(tzinfo=timezone.utc)
-            db_timestamp = int(datetime_obj.timestamp() * 1000)
-
-            try:
-                # Ensure the value is not NaN or Inf, which Decimal cannot handle
-                if pd.isna(row['Value']) or not pd.Series(row['Value']).is_finite().all():
-                    print(f"Skipping row due to non-finite value: {row['Value']} for {metric_id_to_store} at {datetime_obj}")
-                    continue
-                value = decimal.Decimal(str(row['Value']))
-            except (ValueError, TypeError, decimal.InvalidOperation) as e:
-                print(f"Could not convert value '{row['Value']}' to Decimal for {metric_id_to_store} at {datetime_obj}. Error: {e}")
-                continue
-
-            source_date_str = datetime_obj.strftime('%Y-%m-%d %H:%M:%S %Z') # Include timezone
-
-            item = {
-                'metricId': metric_id_to_store,
-                'timestamp': db_timestamp, # Primary Sort Key
-                'value': value,
-                'sourceDate': source_date_str,
-                'unit': unit
-            }
-
-            batch.put_item(Item=item)
-            items_stored_count += 1
-
-    print(f"Successfully prepared {items_stored_count} items for metric '{metric_id_to_store}' for DynamoDB batch write.")
+    # Drop NaN/Inf values, which Decimal cannot store, with a single mask over the whole column
+    finite_mask = np.isfinite(pd.to_numeric(df['Value'], errors='coerce').to_numpy(dtype='float64'))
+    if not finite_mask.all():
+        logger.warning("Skipping %d rows with non-finite values for %s.", int((~finite_mask).sum()), metric_id_to_store)
+        df = df[finite_mask]
+        if df.empty:
+            return 0
+
+    # Ensure DateTime is timezone-aware (UTC). fetch_cnbc_data already supplies the int64 millisecond 'timestamp'
+    # column; for other frames derive it from DateTime with a single int64 array cast
+    date_times = df['DateTime']
+    date_times = date_times.dt.tz_localize('UTC') if date_times.dt.tz is None else date_times.dt.tz_convert('UTC')
+    if 'timestamp' in df.columns:
+        df = df.assign(DateTime=date_times)
+    else:
+        utc_values = date_times.dt.tz_convert(None).to_numpy() # Naive datetime64 holding the UTC wall time
+        df = df.assign(DateTime=date_times, timestamp=utc_values.astype('datetime64[ms]').astype('int64'))
+
+    # Only write bars from the latest stored one onwards; the latest stored bar is rewritten because
+    # its close may still have moved since the previous poll
+    if latest_stored_timestamp is not None:
+        df = df[df['timestamp'] >= latest_stored_timestamp]
+        if df.empty:
+            logger.info("No new data points for %s since the last stored timestamp %d.", metric_id_to_store, latest_stored_timestamp)
+            return 0
+
+    # Derive every per-item string column up front so the loop below only assembles dicts
+    # repr over plain Python floats: the shortest string that round-trips, so nothing is rounded away
+    value_strs = [repr(value) for value in df['Value'].astype('float64').tolist()]
+    source_date_strs = df['DateTime'].dt.strftime('%Y-%m-%d %H:%M:%S %Z').to_numpy() # Include timezone
+    timestamps_ms = df['timestamp'].to_numpy()
+
+    items = []
+    # Zip the column arrays directly; avoids both per-row Series and the column-subset copy itertuples needs
+    for db_timestamp, value_str, source_date_str in zip(timestamps_ms, value_strs, source_date_strs):
+        item = {
+            'metricId': metric_id_to_store,
+            'timestamp': int(db_timestamp), # Primary Sort Key
+            'value': decimal.Decimal(value_str), # Exact decimal form of the float close
+            'sourceDate': source_date_str,
+            'unit': unit
+        }
+        items.append(item)
+
+    items_stored_count = write_items_to_dynamodb(dynamodb_client, DYNAMODB_TABLE_NAME, items)
+
+    logger.info("Successfully wrote %d items for metric '%s' to DynamoDB in batches of %d.", items_stored_count, metric_id_to_store, DYNAMODB_BATCH_SIZE)
     return items_stored_count
 
-def fetch_cnbc_data(symbol_to_fetch, time_range):
+# --- CNBC Conditional GET Cache ---
+# Validators (ETag/Last-Modified) of the last stored response per metric are kept in a DynamoDB state item
+# and sent back, so a poll with no new bar costs a single 304 instead of a full download, parse and write.
+# The same item holds 'lastTimestamp', the newest bar of the last complete write. It is the incremental-write
+# watermark instead of the table's newest row, because parallel chunks can land a newer row while an older
+# chunk fails, and that newer row must not hide the lost ones from the next run.
+def build_state_id(metric_id):
+    """Returns the metricId of the state item for metric_id, e.g. CNBC_US10YTIP_1D_Close#state."""
+    return f"{metric_id}#state"
+
+def fetch_cnbc_data(symbol_to_fetch, time_range, cached_validators=None):
     """
-    Fetches historical data for a given symbol from CNBC for a given time range.
-    Returns a DataFrame with 'DateTime' and 'Value' columns.
+    Fetches historical data for a given symbol from CNBC for a given time range, conditional on the
+    {'etag', 'lastModified'} validators of the last stored response if they are passed in.
+    Returns a DataFrame with 'DateTime', 'Value' and int64 epoch-millisecond 'timestamp' columns, carrying the response validators
+    in df.attrs['cache_validators'], or None if CNBC reports the data unchanged (HTTP 304).
     """
-    base_url = "https://webql-redesign.cnbcfm.com/graphql"
-    variables_payload = {"symbol": symbol_to_fetch, "timeRange": time_range}
-    extensions_payload = {
-        "persistedQuery": {
-            "version": 1,
-            "sha256Hash": "9e1670c29a10707c417a1efd327d4b2b1d456b77f1426e7e84fb7d399416bb6b"
+    conditional_headers = {}
+    cached_validators = cached_validators or {}
+    if cached_validators.get('etag'):
+        conditional_headers['If-None-Match'] = cached_validators['etag']
+    if cached_validators.get('lastModified'):
+        conditional_headers['If-Modified-Since'] = cached_validators['lastModified']
+
+    logger.debug("Fetching CNBC data for symbol: %s, time range: %s", symbol_to_fetch, time_range)
+    try:
+        response = SESSION.get(build_request_url(symbol_to_fetch, time_range), headers=conditional_headers, timeout=CNBC_REQUEST_TIMEOUT)
+        if response.status_code == 304:
+            logger.debug("CNBC reports %s (%s) unchanged since the last fetch (HTTP 304).", symbol_to_fetch, time_range)
+            return None
+        response.raise_for_status()
+        data = orjson.loads(response.content)
+
+        # Walk data -> chartData -> priceBars once, binding each level locally
+        response_data = data.get("data") if isinstance(data, dict) else None
+        chart_data = response_data.get("chartData") if isinstance(response_data, dict) else None
+        price_bars = chart_data.get("priceBars") if isinstance(chart_data, dict) else None
+
+        if not isinstance(price_bars, list):
+            logger.warning("Could not find 'priceBars' structure for %s (%s). Response data keys: %s", symbol_to_fetch, time_range, data.keys() if isinstance(data, dict) else 'Not a dict')
+            if isinstance(response_data, dict):
+                logger.warning("data['chartData'] keys: %s", chart_data.keys() if isinstance(chart_data, dict) else 'chartData not found or not a dict')
+            return pd.DataFrame(columns=['DateTime', 'Value']) # Return empty DF for structure issues
+
+        if not price_bars:
+            logger.warning("Price bars data received for %s (%s), but it was empty.", symbol_to_fetch, time_range)
+            return pd.DataFrame(columns=['DateTime', 'Value'])
+
+        # Parse all bars with column-wise pandas conversions; bars with a missing/invalid timestamp or a
+        # non-numeric close (CNBC sometimes returns "UNCH") become NaN/NaT and are dropped together
+        # Only the two needed fields are pulled from the bar dicts; a DataFrame of the whole list would
+        # infer dtypes for every field CNBC sends (open, high, low, volume, ...) just to drop them again
+        timestamps_ms = pd.to_numeric(pd.Series([bar.get('tradeTimeinMills') for bar in price_bars], dtype=object), errors='coerce')
+        raw_closes = pd.Series([bar.get('close') for bar in price_bars], dtype=object)
+        # Most closes are plain JSON numbers and convert directly; only the leftovers are stringified to strip
+        # a trailing '%' (close may be a percentage string) before a second parse
+        close_values = pd.to_numeric(raw_closes, errors='coerce')
+        needs_cleanup = close_values.isna() & raw_closes.notna()
+        if needs_cleanup.any():
+            close_values[needs_cleanup] = pd.to_numeric(raw_closes[needs_cleanup].astype(str).str.rstrip('%'), errors='coerce')
+        df = pd.DataFrame({
+            'DateTime': pd.to_datetime(timestamps_ms, unit='ms', utc=True),
+            'Value': close_values,
+            'timestamp': timestamps_ms # Raw epoch millis, kept so storage needs no datetime round-trip
+        }).dropna()
+        df['timestamp'] = df['timestamp'].astype('int64')
+
+        skipped_bars = len(price_bars) - len(df)
+        if skipped_bars:
+            logger.debug("Skipped %d of %d bars for %s due to a missing timestamp or non-numeric close value.", skipped_bars, len(price_bars), symbol_to_fetch)
+
+        df.sort_values(by='DateTime', inplace=True) # Ensure data is sorted by time
+        df.attrs['cache_validators'] = {
+            'etag': response.headers.get('ETag'),
+            'lastModified': response.headers.get('Last-Modified')
         }
-    }
-    params = {
-        "operationName": "getQuoteChartData",
-        "variables": json.dumps(variables_payload),
-        "extensions": json.dumps(extensions_payload)
-    }
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-        'Accept': 'application/json',
-        'Referer': 'https://www.cnbc.com/',
-        'Origin': 'https://www.cnbc.com'
-    }
+        return df
+
+    except requests.exceptions.HTTPError as http_err:
+        logger.error("HTTP error for %s (%s): %s.", symbol_to_fetch, time_range, http_err)
+    except requests.exceptions.RequestException as e:
+        logger.error("Request error for %s (%s) after retries: %s.", symbol_to_fetch, time_range, e)
+    except orjson.JSONDecodeError as e_json:
+        logger.error("JSON decode error for %s (%s): %s. Response text: %s.", symbol_to_fetch, time_range, e_json, response.text if 'response' in locals() else 'No response text')
+    except Exception as e_proc:
+        logger.exception("Unexpected error processing %s (%s): %s.", symbol_to_fetch, time_range, e_proc)
+    return pd.DataFrame(columns=['DateTime', 'Value'])
+
+def process_fetch_job(job):
+    """
+    Runs one job's pipeline with its failures contained: any error, from the state lookup through the
+    store to the state save, is logged and counts as 0 so the other jobs still store and log their results.
+    """
+    try:
+        return run_fetch_job(job)
+    except Exception as e:
+        logger.exception("Job for %s failed; its state is left unchanged: %s", job[2], e)
+        return 0
 
-    print(f"Fetching CNBC data for symbol: {symbol_to_fetch}, time range: {time_range}")
-    max_retries = 3
-    retry_delay = 5 # seconds
-    for attempt in range(max_retries):
-        try:
-            response = requests.get(base_url, params=params, headers=headers, timeout=30)
-            response.raise_for_status()
-            data = response.json()
-
-            if (data.get("data") and
-                isinstance(data["data"], dict) and
-                data["data"].get("chartData") and
-                isinstance(data["data"]["chartData"], dict) and
-                data["data"]["chartData"].get("priceBars")):
-
-                price_bars = data["data"]["chartData"]["priceBars"]
-                processed_data = []
-
-                if not price_bars:
-                    print(f"Price bars data received for {symbol_to_fetch} ({time_range}), but it was empty.")
-                    return pd.DataFrame(processed_data, columns=['DateTime', 'Value'])
-
-                for bar in price_bars:
-                    try:
-                        timestamp_val = bar.get("tradeTimeinMills")
-                        if timestamp_val is None:
-                            print(f"Skipping a bar due to missing 'tradeTimeinMills'. Bar data: {bar}")
-                            continue
-
-                        timestamp_ms = int(timestamp_val)
-                        # Ensure UTC for consistency
-                        dt_object = datetime.fromtimestamp(timestamp_ms / 1000, tz=timezone.utc)
-
-                        close_value_str = str(bar.get("close", "0"))
-
-                        try:
-                            # CNBC sometimes returns "UNCH", handle this by trying to convert and skipping if error
-                            # Or if it returns percentage strings
-                            if '%' in close_value_str:
-                                value_to_store = float(close_value_str.replace('%', ''))
-                            else:
-                                value_to_store = float(close_value_str)
-                        except ValueError:
-                            print(f"Skipping bar due to non-numeric close value: '{close_value_str}'. Symbol: {symbol_to_fetch}, Bar: {bar}")
-                            continue
-
-                        processed_data.append({
-                            "DateTime": dt_object, # This is a datetime object
-                            "Value": value_to_store
-                        })
-                    except (ValueError, TypeError) as e_bar:
-                        print(f"Skipping a bar for {symbol_to_fetch} due to data conversion error: {e_bar}. Bar data: {bar}")
-                        continue
-
-                df = pd.DataFrame(processed_data)
-                if not df.empty:
-                    df.sort_values(by='DateTime', inplace=True) # Ensure data is sorted by time
-                return df
-            else:
-                print(f"Could not find 'priceBars' structure for {symbol_to_fetch} ({time_range}). Response data keys: {data.keys() if isinstance(data, dict) else 'Not a dict'}")
-                if data and data.get("data") and isinstance(data["data"], dict):
-                     print(f"data['chartData'] keys: {data['data']['chartData'].keys() if data['data'].get('chartData') and isinstance(data['data']['chartData'], dict) else 'chartData not found or not a dict'}")
-                return pd.DataFrame(columns=['DateTime', 'Value']) # Return empty DF for structure issues
-
-        except requests.exceptions.HTTPError as http_err:
-            print(f"HTTP error for {symbol_to_fetch} ({time_range}): {http_err}. Attempt {attempt + 1} of {max_retries}.")
-            if attempt + 1 == max_retries: return pd.DataFrame(columns=['DateTime', 'Value'])
-        except requests.exceptions.RequestException as e:
-            print(f"Request error for {symbol_to_fetch} ({time_range}): {e}. Attempt {attempt + 1} of {max_retries}.")
-            if attempt + 1 == max_retries: return pd.DataFrame(columns=['DateTime', 'Value'])
-        except json.JSONDecodeError as e_json:
-            print(f"JSON decode error for {symbol_to_fetch} ({time_range}): {e_json}. Response text: {response.text if 'response' in locals() else 'No response text'}. Attempt {attempt + 1} of {max_retries}.")
-            if attempt + 1 == max_retries: return pd.DataFrame(columns=['DateTime', 'Value'])
-        except Exception as e_proc:
-            print(f"Unexpected error processing {symbol_to_fetch} ({time_range}): {e_proc}. Attempt {attempt + 1} of {max_retries}.")
-            if attempt + 1 == max_retries: return pd.DataFrame(columns=['DateTime', 'Value'])
-        time.sleep(retry_delay) # Wait before retrying
-    return pd.DataFrame(columns=['DateTime', 'Value']) # Should be unreachable if loop completes
+def run_fetch_job(job):
+    """
+    Runs the fetch -> store pipeline for one (symbol, time_range, metric_id) job.
+    Returns the number of items written to DynamoDB.
+    """
+    symbol, time_range, metric_id = job
+    state_id = build_state_id(metric_id)
+    state = load_state_item(dynamodb_client, DYNAMODB_TABLE_NAME, state_id)
+    last_timestamp = int(state['lastTimestamp']) if 'lastTimestamp' in state else None
+    df_data = fetch_cnbc_data(symbol, time_range, state)
+
+    if df_data is not None and not df_data.empty:
+        logger.info("Successfully fetched %d data points for %s (%s).", len(df_data), symbol, time_range)
+
+        logger.debug("Storing fetched %s data into DynamoDB...", metric_id)
+        items_written = store_data_in_dynamodb(df_data, metric_id, UNIT_FOR_METRIC, last_timestamp)
+        logger.debug("DynamoDB storage process completed. %d items for %s processed.", items_written, metric_id)
+        # Reached only when every item was written; a partial write raised above and keeps the old state
+        newest_timestamp = int(df_data['timestamp'].max())
+        save_state_item(dynamodb_client, DYNAMODB_TABLE_NAME, state_id, {
+            **df_data.attrs.get('cache_validators', {}),
+            'lastTimestamp': newest_timestamp if last_timestamp is None else max(last_timestamp, newest_timestamp)
+        })
+        return items_written
+
+    if df_data is not None:
+        logger.warning("Fetched data for %s (%s), but it resulted in an empty DataFrame (no processable price bars, API returned no data, or the fetch failed).", symbol, time_range)
+    else: # df_data is None (CNBC answered 304 Not Modified)
+        logger.info("Data for %s (%s) is unchanged since the last stored fetch. Skipping DynamoDB storage.", symbol, time_range)
+    return 0
+
+def run_scraper(jobs, max_workers=MAX_FETCH_WORKERS):
+    """
+    Runs every (symbol, time_range, metric_id) job's fetch -> store pipeline in parallel threads over the
+    shared SESSION, so one job's DynamoDB write overlaps the other jobs' fetches and the run takes about
+    as long as its slowest job rather than the sum of all of them.
+    Returns the total number of items written.
+    """
+    if not jobs:
+        return 0
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(jobs))) as executor:
+        return sum(executor.map(process_fetch_job, jobs))
 
 
 if __name__ == "__main__":
-    print(f"--- Running CNBC Generic Data Scraper ---")
-    print(f"Target Symbol: {SYMBOL_TO_FETCH}, Time Range: {TIME_RANGE_TO_FETCH}")
-    print(f"Target DynamoDB Metric ID: {METRIC_ID_FOR_DYNAMODB}")
-    print(f"Target DynamoDB Table: {DYNAMODB_TABLE_NAME}")
-    print(f"Metric Unit: {UNIT_FOR_METRIC}")
+    fetch_jobs = build_fetch_jobs()
+
+    logger.info("--- Running CNBC Generic Data Scraper ---")
+    logger.info("Target Symbols: %s, Time Ranges: %s", ', '.join(SYMBOLS_TO_FETCH), ', '.join(TIME_RANGES_TO_FETCH))
+    logger.info("Target DynamoDB Metric IDs: %s", ', '.join(metric_id for _, _, metric_id in fetch_jobs))
+    logger.info("Target DynamoDB Table: %s", DYNAMODB_TABLE_NAME)
+    logger.info("Metric Unit: %s", UNIT_FOR_METRIC)
 
     # Ensure DynamoDB table object is valid before proceeding
     if 'table' not in globals() or table is None:
-        print("DynamoDB table could not be initialized. Exiting.")
+        logger.error("DynamoDB table could not be initialized. Exiting.")
         exit(1) # Exit if DynamoDB isn't set up
 
-    df_data = fetch_cnbc_data(symbol_to_fetch=SYMBOL_TO_FETCH, time_range=TIME_RANGE_TO_FETCH)
-
-    if df_data is not None and not df_data.empty:
-        print(f"Successfully fetched {len(df_data)} data points for {SYMBOL_TO_FETCH} ({TIME_RANGE_TO_FETCH}).")
-
-        print(f"\nStoring fetched {METRIC_ID_FOR_DYNAMODB} data into DynamoDB...")
-        items_written = store_data_in_dynamodb(df_data, METRIC_ID_FOR_DYNAMODB, UNIT_FOR_METRIC)
-        print(f"DynamoDB storage process completed. {items_written} items for {METRIC_ID_FOR_DYNAMODB} processed.")
-
-    elif df_data is not None and df_data.empty:
-        print(f"Fetched data for {SYMBOL_TO_FETCH} ({TIME_RANGE_TO_FETCH}), but it resulted in an empty DataFrame (no processable price bars or API returned no data).")
-    else: # df_data is None (meaning an error occurred during fetch or initial processing)
-        print(f"Failed to fetch or process data for {SYMBOL_TO_FETCH} ({TIME_RANGE_TO_FETCH}). Check logs for errors.")
+    total_items_written = run_scraper(fetch_jobs)
+    logger.info("Wrote %d items across %d jobs.", total_items_written, len(fetch_jobs))
 
-    print(f"--- CNBC Generic Data Scraper Finished ---")
+    logger.info("--- CNBC Generic Data Scraper Finished ---")
 
 # --- END OF FILE CNBC_Fetcher.py ---
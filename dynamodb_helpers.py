@@ -0,0 +1,127 @@
+# --- START OF FILE dynamodb_helpers.py ---
+# DynamoDB batch-write and fetch-state helpers shared by CMESOFR.py and CNBC_Fetcher.py
+import os
+import time
+import logging
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+from botocore.config import Config
+from botocore.exceptions import BotoCoreError, ClientError
+
+logger = logging.getLogger(__name__)
+
+DYNAMODB_BATCH_SIZE = 25 # BatchWriteItem accepts at most 25 put requests per call
+DYNAMODB_MAX_WRITE_ATTEMPTS = 5
+DYNAMODB_WRITE_WORKERS = int(os.environ.get('DYNAMODB_WRITE_WORKERS', '8'))
+THROTTLING_ERROR_CODES = ('ProvisionedThroughputExceededException', 'ThrottlingException')
+serializer = TypeSerializer()
+deserializer = TypeDeserializer()
+
+# Client config for every DynamoDB resource/client the scrapers create. Adaptive client-side retries absorb
+# throttling bursts; keep-alive and a connection pool at least as large as the write workers let the parallel
+# batch writes reuse their connections instead of reconnecting
+DYNAMODB_CLIENT_CONFIG = Config(
+    retries={'mode': 'adaptive', 'max_attempts': 10},
+    tcp_keepalive=True,
+    max_pool_connections=max(25, DYNAMODB_WRITE_WORKERS)
+)
+
+# One write pool per process: every caller's chunks share these threads, so concurrent scraper jobs together
+# never run more than DYNAMODB_WRITE_WORKERS batch_write_item calls at once. Keep it low enough that the
+# concurrent chunks stay within the table's write capacity
+WRITE_EXECUTOR = ThreadPoolExecutor(max_workers=DYNAMODB_WRITE_WORKERS, thread_name_prefix='dynamodb-write')
+
+class IncompleteWriteError(Exception):
+    """Raised when a batch write could not store every item, so callers never mark partial data as stored."""
+
+def chunked(iterable, size):
+    """Yields successive lists of at most `size` items from `iterable`."""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+def write_chunk_to_dynamodb(client, table_name, chunk):
+    """
+    Writes one chunk of at most 25 serialized put requests with batch_write_item, retrying
+    throttling errors and UnprocessedItems with exponential backoff.
+    Returns the number of items written; raises IncompleteWriteError if any remain unprocessed.
+    """
+    pending = chunk
+    attempt = 0
+    while pending and attempt < DYNAMODB_MAX_WRITE_ATTEMPTS:
+        if attempt:
+            time.sleep(2 ** (attempt - 1))
+        attempt += 1
+        try:
+            response = client.batch_write_item(RequestItems={table_name: pending})
+            pending = response.get('UnprocessedItems', {}).get(table_name, [])
+        except ClientError as e:
+            error_code = e.response.get('Error', {}).get('Code')
+            if error_code not in THROTTLING_ERROR_CODES or attempt == DYNAMODB_MAX_WRITE_ATTEMPTS:
+                raise
+            logger.warning("DynamoDB throttled the batch write (%s). Retrying chunk (attempt %d of %d).", error_code, attempt, DYNAMODB_MAX_WRITE_ATTEMPTS)
+    if pending:
+        raise IncompleteWriteError(f"{len(pending)} of {len(chunk)} items remained unprocessed after {DYNAMODB_MAX_WRITE_ATTEMPTS} attempts.")
+    return len(chunk)
+
+def write_items_to_dynamodb(client, table_name, items):
+    """
+    Serializes items to DynamoDB wire format once and writes them with the low-level
+    client's batch_write_item in 25-item chunks. Chunks are dispatched concurrently on the
+    shared WRITE_EXECUTOR (boto3 clients are thread-safe), each with its own retry/backoff.
+    Returns the number of unique items written. If any chunk fails, chunks that have not
+    started are cancelled and the error is re-raised; chunks already in flight may still land.
+    """
+    # Dedupe repeated metricId+timestamp keys (last one wins); BatchWriteItem rejects duplicates in one request
+    unique_items = {(item['metricId'], item['timestamp']): item for item in items}.values()
+    put_requests = [
+        {'PutRequest': {'Item': {key: serializer.serialize(value) for key, value in item.items()}}}
+        for item in unique_items
+    ]
+
+    futures = [
+        WRITE_EXECUTOR.submit(write_chunk_to_dynamodb, client, table_name, chunk)
+        for chunk in chunked(put_requests, DYNAMODB_BATCH_SIZE)
+    ]
+    try:
+        return sum(future.result() for future in futures)
+    except Exception:
+        for future in futures:
+            future.cancel()
+        raise
+
+# --- Fetch State Items ---
+# Per-scraper state (HTTP cache validators, ...) is kept in the data table itself, one item per state id under
+# its own metricId and timestamp 0. Each scheduled run is a fresh task, so nothing on local disk survives to the next
+STATE_ITEM_TIMESTAMP = 0
+
+# Read and written through the low-level client, which is thread-safe, unlike the boto3 Table resource,
+# because CNBC jobs run on worker threads
+def build_state_key(state_id):
+    return {'metricId': serializer.serialize(state_id), 'timestamp': serializer.serialize(STATE_ITEM_TIMESTAMP)}
+
+def load_state_item(client, table_name, state_id):
+    """Returns the stored state attributes for state_id, or an empty dict if there are none or the lookup fails."""
+    try:
+        response = client.get_item(TableName=table_name, Key=build_state_key(state_id))
+    except (ClientError, BotoCoreError) as e: # API errors as well as connection, timeout and credential failures
+        logger.warning("Could not read the state item %s: %s", state_id, e)
+        return {}
+    item = response.get('Item') or {}
+    return {key: deserializer.deserialize(value) for key, value in item.items() if key not in ('metricId', 'timestamp')}
+
+def save_state_item(client, table_name, state_id, attributes):
+    """Replaces the state item for state_id with the non-empty attributes. Failures are logged, not raised."""
+    state = {key: serializer.serialize(value) for key, value in attributes.items() if value is not None}
+    if not state:
+        return
+    try:
+        client.put_item(TableName=table_name, Item={**build_state_key(state_id), **state})
+    except (ClientError, BotoCoreError) as e: # API errors as well as connection, timeout and credential failures
+        logger.warning("Could not write the state item %s: %s", state_id, e)
+
+# --- END OF FILE dynamodb_helpers.py ---